@@ -2,16 +2,21 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 from datetime import datetime
+import io
 import os
-from utils.image_processing import analyze_crop_image, calculate_ndvi
+from utils.image_processing import analyze_crop_image, preview_crop_image, calculate_ndvi
 from utils.data_manager import load_historical_data, save_analysis_result
-from utils.visualization import plot_health_history, plot_health_metrics
+from utils.visualization import (plot_health_history, plot_health_metrics,
+                                 plot_hectares_by_crop_type, plot_health_by_crop_type)
 from utils.auth import init_auth_db, init_session_state, login_required, display_login_page
-from utils.crop_manager import save_crop_details, get_user_crops, get_user_id
+from utils.crop_manager import (init_crop_db, save_crop_details, save_crop_analysis,
+                                get_user_crops, count_user_crops, get_user_id)
+from utils.analytics import (init_analytics_db, refresh_health_summary, get_hectares_by_crop_type,
+                             get_health_by_crop_type_and_month, get_summary_last_updated,
+                             get_summary_refreshed_at, HEALTH_SUMMARY_REFRESH_MINUTES)
 
-# Initialize authentication database and session state
-init_auth_db()
-init_session_state()
+# Number of crops shown per page in the "Your Crops" list
+CROPS_PER_PAGE = 20
 
 # Page configuration
 st.set_page_config(
@@ -21,6 +26,17 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+@st.cache_resource(show_spinner=False)
+def init_databases():
+    """Create database tables once per server process rather than on every rerun"""
+    init_auth_db()
+    init_crop_db()
+    init_analytics_db()
+
+# Initialize databases and session state
+init_databases()
+init_session_state()
+
 # Custom CSS for better styling
 st.markdown("""
     <style>
@@ -42,9 +58,7 @@ st.markdown("""
 def show_crop_details():
     st.title("🌱 Crop Details")
 
-    # Get existing crops for the user
     user_id = get_user_id(st.session_state.username)
-    existing_crops = get_user_crops(user_id)
 
     col1, col2 = st.columns(2)
 
@@ -71,9 +85,19 @@ def show_crop_details():
 
     with col2:
         st.header("Your Crops")
-        if existing_crops.empty:
+        total_crops = count_user_crops(user_id)
+        if total_crops == 0:
             st.info("No crops added yet. Use the form on the left to add your first crop!")
         else:
+            # Only fetch the crops on the current page
+            total_pages = (total_crops + CROPS_PER_PAGE - 1) // CROPS_PER_PAGE
+            page_number = 1
+            if total_pages > 1:
+                page_number = st.number_input("Page", min_value=1, max_value=total_pages, step=1)
+                st.caption(f"Page {page_number} of {total_pages} ({total_crops} crops)")
+            existing_crops = get_user_crops(user_id, limit=CROPS_PER_PAGE,
+                                            offset=(page_number - 1) * CROPS_PER_PAGE)
+
             for _, crop in existing_crops.iterrows():
                 with st.expander(f"🌾 {crop['crop_name']}"):
                     st.write(f"**Type:** {crop['crop_type']}")
@@ -88,17 +112,126 @@ def show_crop_details():
                         st.session_state.selected_crop_name = crop['crop_name']
                         st.rerun()
 
+def show_health_score(container, analysis_results):
+    """Display the health score and stress level, returning both"""
+    ndvi_score = calculate_ndvi(analysis_results['green_ratio'], analysis_results['nir_estimate'])
+    error_estimate = analysis_results.get('error_estimate')
+
+    with container:
+        if error_estimate:
+            st.info("⚡ Quick preview - refining on the full image...")
+            st.metric("Overall Health Score", f"{ndvi_score:.2f} ± {error_estimate['ndvi']:.3f}")
+        else:
+            st.success("✅ Analysis Complete!")
+            st.metric("Overall Health Score", f"{ndvi_score:.2f}")
+
+        # Color-coded stress level
+        stress_level = "Low" if ndvi_score > 0.6 else "Medium" if ndvi_score > 0.4 else "High"
+        stress_color = "green" if stress_level == "Low" else "orange" if stress_level == "Medium" else "red"
+        st.markdown(f"### Stress Level: <span style='color:{stress_color}'>{stress_level}</span>", unsafe_allow_html=True)
+
+    return ndvi_score, stress_level
+
+def show_disease_results(container, analysis_results):
+    """Display detected condition and treatment recommendations"""
+    with container:
+        # Preview and final results share one layout so each element replaces its preview
+        if analysis_results.get('error_estimate'):
+            st.info("⚡ Quick preview - refining on the full image...")
+        else:
+            st.success("✅ Analysis Complete!")
+        if analysis_results['disease_detection']['success']:
+            disease_info = analysis_results['disease_detection']['disease_info']
+
+            # Display disease information in an organized way
+            col1, col2 = st.columns(2)
+            with col1:
+                st.markdown(f"### Detection Results")
+                st.markdown(f"**Condition:** {disease_info['name']}")
+                st.markdown(f"**Confidence:** {disease_info['confidence']}")
+                st.markdown(f"**Severity:** {disease_info['severity']}")
+                st.markdown(f"**Description:** {disease_info['description']}")
+
+            with col2:
+                st.markdown("### Recommendations")
+                st.markdown("\n".join(f"- {rec}" for rec in analysis_results['disease_detection']['recommendations']))
+        else:
+            st.error("Error in disease detection. Please try again with a clearer image.")
+
+def show_detailed_metrics(container, analysis_results):
+    """Display vegetation coverage and NIR reflection"""
+    error_estimate = analysis_results.get('error_estimate')
+
+    with container:
+        if error_estimate:
+            st.info("⚡ Quick preview - saving is available once the full image is analyzed.")
+        else:
+            st.success("✅ Analysis Complete!")
+        metrics_col1, metrics_col2 = st.columns(2)
+        with metrics_col1:
+            coverage = f"{analysis_results['green_ratio']*100:.1f}%"
+            if error_estimate:
+                coverage += f" ± {error_estimate['green_ratio']*100:.1f}%"
+            st.metric("Vegetation Coverage", coverage)
+        with metrics_col2:
+            nir = f"{analysis_results['nir_estimate']:.2f}"
+            if error_estimate:
+                nir += f" ± {error_estimate['nir_estimate']:.3f}"
+            st.metric("NIR Reflection", nir)
+
+@login_required
+def show_farm_analytics():
+    st.title("📈 Farm Analytics")
+
+    user_id = get_user_id(st.session_state.username)
+
+    st.markdown("### Field Area by Crop Type")
+    hectares = get_hectares_by_crop_type(user_id)
+    if hectares.empty:
+        st.info("No crops added yet. Add crops on the Crop Details page to see farm-wide totals.")
+    else:
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("Total Fields", int(hectares['field_count'].sum()))
+        with col2:
+            st.metric("Total Hectares", f"{hectares['total_hectares'].astype(float).sum():.1f}")
+        st.plotly_chart(plot_hectares_by_crop_type(hectares), use_container_width=True)
+        st.dataframe(hectares, hide_index=True)
+
+    st.markdown("### Average Health by Crop Type")
+    # Throttled: skipped if the summary is recent or another session is refreshing it
+    with st.spinner("Updating health summary..."):
+        refresh_health_summary()
+
+    health = get_health_by_crop_type_and_month(user_id)
+    refreshed_at = get_summary_refreshed_at()
+    if refreshed_at:
+        st.caption(f"Summary refreshed {refreshed_at:%Y-%m-%d %H:%M} "
+                   f"(updates at most every {HEALTH_SUMMARY_REFRESH_MINUTES} minutes)")
+    if health.empty:
+        st.info("No saved analyses in the summary yet. Save an analysis for one of your crops "
+                "on the Crop Analysis page.")
+    else:
+        last_updated = get_summary_last_updated(user_id)
+        if last_updated:
+            st.caption(f"Includes your analyses up to {last_updated:%Y-%m-%d %H:%M}")
+        st.plotly_chart(plot_health_by_crop_type(health), use_container_width=True)
+        st.dataframe(health, hide_index=True)
+
 @login_required
 def show_main_content():
     # Sidebar with navigation and info
     with st.sidebar:
         st.image("https://img.icons8.com/color/96/000000/farm.png", width=100)
         st.title(f"Welcome, {st.session_state.username}!")
-        page = st.radio("Navigation", ["Crop Details", "Dashboard", "Crop Analysis", "Historical Data"])
+        page = st.radio("Navigation", ["Crop Details", "Dashboard", "Crop Analysis", "Historical Data",
+                                        "Farm Analytics"])
 
         if st.button("Logout"):
             st.session_state.authenticated = False
             st.session_state.username = None
+            st.session_state.pop('selected_crop_id', None)
+            st.session_state.pop('selected_crop_name', None)
             st.rerun()
 
         st.markdown("---")
@@ -151,69 +284,86 @@ def show_main_content():
         The system will analyze vegetation health, detect potential diseases, and provide recommendations.
         """)
 
+        # The farmer picks the crop explicitly so results never land on another field
+        user_id = get_user_id(st.session_state.username)
+        user_crops = get_user_crops(user_id)
+        crop_names = {int(crop_id): name for crop_id, name in zip(user_crops.get('id', []),
+                                                                  user_crops.get('crop_name', []))}
+        analysis_crop_id = st.selectbox(
+            "Crop in this photo",
+            options=list(crop_names),
+            index=None,
+            format_func=lambda crop_id: crop_names[crop_id],
+            placeholder="Select a crop",
+            help="Saved analyses are recorded against this crop"
+        )
+        if not crop_names:
+            st.info("Add a crop on the Crop Details page to save analyses for it.")
+
         uploaded_file = st.file_uploader("Choose a field image (JPG, PNG)", type=['jpg', 'jpeg', 'png'])
+        progressive = st.toggle("Quick preview first", value=True,
+                                help="Show a fast low-resolution result in every tab, then refine it on the full image. "
+                                     "The final result takes slightly longer than without the preview.")
 
         if uploaded_file:
             # Create tabs for different views
             tab1, tab2, tab3 = st.tabs(["Analysis Results", "Disease Detection", "Detailed Metrics"])
 
+            # Placeholders let a preview fill every tab, then be replaced by the full result
             with tab1:
                 col1, col2 = st.columns(2)
                 with col1:
                     st.image(uploaded_file, caption="Uploaded Image", use_column_width=True)
-
                 with col2:
-                    with st.spinner("Analyzing image..."):
-                        analysis_results = analyze_crop_image(uploaded_file)
-                        ndvi_score = calculate_ndvi(analysis_results['green_ratio'], analysis_results['nir_estimate'])
-
-                        st.success("✅ Analysis Complete!")
-                        st.metric("Overall Health Score", f"{ndvi_score:.2f}")
-
-                        # Color-coded stress level
-                        stress_level = "Low" if ndvi_score > 0.6 else "Medium" if ndvi_score > 0.4 else "High"
-                        stress_color = "green" if stress_level == "Low" else "orange" if stress_level == "Medium" else "red"
-                        st.markdown(f"### Stress Level: <span style='color:{stress_color}'>{stress_level}</span>", unsafe_allow_html=True)
-
+                    score_area = st.empty()
             with tab2:
                 st.header("🔍 Disease Detection Results")
-                if analysis_results['disease_detection']['success']:
-                    disease_info = analysis_results['disease_detection']['disease_info']
-
-                    # Display disease information in an organized way
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        st.markdown(f"### Detection Results")
-                        st.markdown(f"**Condition:** {disease_info['name']}")
-                        st.markdown(f"**Confidence:** {disease_info['confidence']}")
-                        st.markdown(f"**Severity:** {disease_info['severity']}")
-                        st.markdown(f"**Description:** {disease_info['description']}")
-
-                    with col2:
-                        st.markdown("### Recommendations")
-                        for rec in analysis_results['disease_detection']['recommendations']:
-                            st.markdown(f"- {rec}")
+                disease_area = st.empty()
+            with tab3:
+                st.markdown("### Detailed Metrics")
+                metrics_area = st.empty()
+
+            # Reuse the full result on reruns (e.g. clicking Save Analysis)
+            if st.session_state.get('analysis_file_id') == uploaded_file.file_id:
+                analysis_results = st.session_state.analysis_results
+            else:
+                if progressive:
+                    # The preview is shown first; the final result arrives after the
+                    # full-resolution analysis, so it takes preview plus full time
+                    preview_results = preview_crop_image(io.BytesIO(uploaded_file.getvalue()))
+                    show_health_score(score_area.container(), preview_results)
+                    show_disease_results(disease_area.container(), preview_results)
+                    show_detailed_metrics(metrics_area.container(), preview_results)
+                    with st.spinner("Refining on full-resolution image..."):
+                        analysis_results = analyze_crop_image(io.BytesIO(uploaded_file.getvalue()))
                 else:
-                    st.error("Error in disease detection. Please try again with a clearer image.")
+                    with st.spinner("Analyzing image..."):
+                        analysis_results = analyze_crop_image(uploaded_file)
+                st.session_state.analysis_file_id = uploaded_file.file_id
+                st.session_state.analysis_results = analysis_results
+
+            ndvi_score, stress_level = show_health_score(score_area.container(), analysis_results)
+            show_disease_results(disease_area.container(), analysis_results)
+            show_detailed_metrics(metrics_area.container(), analysis_results)
 
             with tab3:
-                st.markdown("### Detailed Metrics")
-                metrics_col1, metrics_col2 = st.columns(2)
-                with metrics_col1:
-                    st.metric("Vegetation Coverage", f"{analysis_results['green_ratio']*100:.1f}%")
-                with metrics_col2:
-                    st.metric("NIR Reflection", f"{analysis_results['nir_estimate']:.2f}")
-
-                if st.button("Save Analysis"):
-                    save_analysis_result({
+                if analysis_crop_id is None:
+                    st.caption("Select the crop in this photo above to save this analysis.")
+                if st.button("Save Analysis", disabled=analysis_crop_id is None):
+                    result = {
                         'date': datetime.now().strftime('%Y-%m-%d'),
                         'ndvi': ndvi_score,
                         'green_ratio': analysis_results['green_ratio'],
                         'stress_level': stress_level,
                         'disease_detection': analysis_results['disease_detection']['disease_info']['name']
                         if analysis_results['disease_detection']['success'] else 'Not detected'
-                    })
-                    st.success("✅ Analysis saved successfully!")
+                    }
+                    # Record against the crop first so a failed save never leaves a CSV row behind
+                    if save_crop_analysis(user_id, analysis_crop_id, result):
+                        save_analysis_result(result)
+                        st.success(f"✅ Analysis saved for {crop_names[analysis_crop_id]}!")
+                    else:
+                        st.error("Error saving analysis for the selected crop. Please try again.")
 
     elif page == "Historical Data":
         st.title("📊 Historical Analysis")
@@ -243,6 +393,9 @@ def show_main_content():
         else:
             st.info("👋 No historical data available yet. Start by analyzing some images!")
 
+    elif page == "Farm Analytics":
+        show_farm_analytics()
+
     # Footer
     st.markdown("---")
     st.markdown("### Need Help?")
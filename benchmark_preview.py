@@ -0,0 +1,99 @@
+"""
+Benchmark preview analysis against full-resolution analysis.
+
+For each sample image, runs preview_crop_image and analyze_crop_image and
+reports how far the preview metrics drift from the full-resolution ones, how
+often the drift stays within the preview's own error estimate, how often the
+disease call agrees, and the speedup.
+
+    python benchmark_preview.py photos/*.jpg
+    python benchmark_preview.py --synthetic 20
+"""
+import argparse
+import io
+import time
+
+import numpy as np
+
+from utils.image_processing import (analyze_crop_image, preview_crop_image, calculate_ndvi,
+                                    REDUCED_DECODE_FLAGS, PREVIEW_REDUCTION)
+from utils.sample_images import make_synthetic_field_image
+
+METRICS = ["green_ratio", "nir_estimate", "ndvi"]
+
+
+def disease_name(results):
+    detection = results['disease_detection']
+    return detection['disease_info']['name'] if detection['success'] else 'Not detected'
+
+
+def timed(func, image_bytes):
+    start = time.perf_counter()
+    results = func(io.BytesIO(image_bytes))
+    return results, time.perf_counter() - start
+
+
+def benchmark(samples, reduction):
+    """Compare preview and full-resolution results over the sample images"""
+    drift = {metric: [] for metric in METRICS}
+    within_estimate = {metric: 0 for metric in METRICS}
+    disease_agreement = 0
+    preview_times, full_times = [], []
+
+    for image_bytes in samples:
+        preview, preview_time = timed(lambda f: preview_crop_image(f, reduction=reduction), image_bytes)
+        full, full_time = timed(analyze_crop_image, image_bytes)
+        preview_times.append(preview_time)
+        full_times.append(full_time)
+
+        preview['ndvi'] = calculate_ndvi(preview['green_ratio'], preview['nir_estimate'])
+        full['ndvi'] = calculate_ndvi(full['green_ratio'], full['nir_estimate'])
+
+        for metric in METRICS:
+            error = abs(preview[metric] - full[metric])
+            drift[metric].append(error)
+            if error <= preview['error_estimate'][metric]:
+                within_estimate[metric] += 1
+
+        if disease_name(preview) == disease_name(full):
+            disease_agreement += 1
+
+    count = len(samples)
+    print(f"\n{count} images, preview at 1/{reduction} resolution")
+    print(f"{'metric':<15}{'mean drift':>12}{'p95 drift':>12}{'max drift':>12}{'within est.':>13}")
+    for metric in METRICS:
+        errors = np.array(drift[metric])
+        print(f"{metric:<15}{errors.mean():>12.4f}{np.percentile(errors, 95):>12.4f}"
+              f"{errors.max():>12.4f}{within_estimate[metric] / count:>13.1%}")
+    print(f"\nDisease call agreement: {disease_agreement / count:.1%}")
+    print(f"Median time: preview {np.median(preview_times) * 1000:.1f} ms, "
+          f"full {np.median(full_times) * 1000:.1f} ms "
+          f"({np.median(full_times) / np.median(preview_times):.1f}x speedup)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark preview vs full-resolution crop analysis")
+    parser.add_argument("images", nargs="*", help="sample image files (JPG, PNG)")
+    parser.add_argument("--synthetic", type=int, default=20,
+                        help="number of synthetic images to use when no files are given (default: 20)")
+    parser.add_argument("--reduction", type=int, default=PREVIEW_REDUCTION,
+                        choices=sorted(REDUCED_DECODE_FLAGS),
+                        help=f"preview downscale factor (default: {PREVIEW_REDUCTION})")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.images:
+        samples = []
+        for path in args.images:
+            with open(path, "rb") as f:
+                samples.append(f.read())
+    else:
+        # Phone-camera sized photos, where reduced decoding matters most
+        rng = np.random.default_rng(args.seed)
+        samples = [make_synthetic_field_image(rng, width=4000, height=3000) for _ in range(args.synthetic)]
+
+    benchmark(samples, args.reduction)
+
+
+if __name__ == "__main__":
+    main()
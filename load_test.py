@@ -0,0 +1,390 @@
+"""
+Concurrent-session load test for AgriSense.
+
+Drives simulated user sessions through the same helpers the Streamlit app
+uses (login, crop list reads, crop writes, image analysis and saving results)
+at increasing concurrency, and reports throughput, latency percentiles and
+error rates per operation.
+
+By default the helpers run against a throwaway SQLite stand-in. Pass
+--database-url to run against a local, ephemeral Postgres instead; the
+harness creates its own users and crops, so never point it at production.
+
+    python load_test.py --concurrency 1,4,16 --sessions 64
+"""
+import argparse
+import io
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+import warnings
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+from datetime import date
+
+import numpy as np
+
+from utils import analytics, auth, crop_manager
+from utils.auth import create_user, verify_user
+from utils.crop_manager import (save_crop_details, save_crop_analysis, get_user_crops,
+                                count_user_crops, get_user_id)
+from utils.data_manager import load_historical_data, save_analysis_result
+from utils.image_processing import analyze_crop_image, calculate_ndvi
+from utils.sample_images import make_synthetic_field_image
+
+OPERATIONS = ["login", "read_crops", "save_crop", "analyze_image", "save_analysis"]
+
+# Where each operation's writes land, for checking reported successes afterwards
+WRITE_OPERATIONS = {"crop_details": "save_crop", "csv": "save_analysis", "crop_analysis": "save_analysis"}
+
+CROP_TYPES = ["Wheat", "Corn", "Soybeans", "Rice", "Cotton", "Potatoes", "Other"]
+
+SQLITE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username VARCHAR(50) UNIQUE NOT NULL,
+        password_hash VARCHAR(100) NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE IF NOT EXISTS crop_details (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER REFERENCES users(id),
+        crop_name VARCHAR(100) NOT NULL,
+        crop_type VARCHAR(50) NOT NULL,
+        planting_date DATE,
+        field_size NUMERIC(10, 2),
+        field_location VARCHAR(200),
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE IF NOT EXISTS crop_analysis (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        crop_id INTEGER REFERENCES crop_details(id) ON DELETE CASCADE,
+        ndvi REAL NOT NULL,
+        green_ratio REAL,
+        stress_level VARCHAR(20),
+        disease_detection VARCHAR(50),
+        analyzed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_crop_details_user ON crop_details (user_id, created_at DESC);
+    CREATE INDEX IF NOT EXISTS idx_crop_analysis_crop ON crop_analysis (crop_id, analyzed_at);
+"""
+
+
+class SQLiteCursor:
+    """psycopg2-style cursor over sqlite3 (%s placeholders, optional dict rows)"""
+
+    def __init__(self, cursor, dict_rows=False):
+        self._cursor = cursor
+        self._dict_rows = dict_rows
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def execute(self, query, params=()):
+        self._cursor.execute(re.sub(r"%s", "?", query), tuple(params or ()))
+        return self
+
+    def _convert(self, row):
+        if row is None or not self._dict_rows:
+            return row
+        return {col[0]: value for col, value in zip(self._cursor.description, row)}
+
+    def fetchone(self):
+        return self._convert(self._cursor.fetchone())
+
+    def fetchall(self):
+        return [self._convert(row) for row in self._cursor.fetchall()]
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """Minimal psycopg2-compatible connection backed by a SQLite file"""
+
+    def __init__(self, path):
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+
+    def cursor(self, cursor_factory=None):
+        return SQLiteCursor(self._conn.cursor(), dict_rows=cursor_factory is not None)
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        self._conn.close()
+
+
+def use_sqlite_database(path):
+    """Point the app's DB helpers at a SQLite stand-in database file"""
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SQLITE_SCHEMA)
+    conn.close()
+
+    def connect():
+        return SQLiteConnection(path)
+
+    for module in (auth, crop_manager, analytics):
+        module.get_db_connection = connect
+
+
+def use_postgres_database(database_url):
+    """Point the app's DB helpers at a Postgres database and create its tables"""
+    os.environ["DATABASE_URL"] = database_url
+    auth.init_auth_db()
+    crop_manager.init_crop_db()
+    analytics.init_analytics_db()
+
+
+class Recorder:
+    """Thread-safe collection of per-operation latencies, errors and confirmed writes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.error_types = Counter()
+        self.writes = Counter()
+
+    def add_errors(self, operation, error_type, count=1):
+        """Record errors found outside a timed call"""
+        with self._lock:
+            self.errors[operation] += count
+            self.error_types[(operation, error_type)] += count
+
+    def count_write(self, table):
+        """Record a write a helper reported as successful"""
+        with self._lock:
+            self.writes[table] += 1
+
+    def timed(self, operation, func, *args, **kwargs):
+        """Run func, recording its latency; a False return or exception is an error"""
+        start = time.perf_counter()
+        error_type = None
+        try:
+            result = func(*args, **kwargs)
+            if result is False:
+                error_type = "returned False"
+        except Exception as e:
+            result, error_type = None, type(e).__name__
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.latencies[operation].append(elapsed)
+            if error_type:
+                self.errors[operation] += 1
+                self.error_types[(operation, error_type)] += 1
+        return None if error_type else result
+
+
+def run_session(recorder, username, password, image_bytes, rng):
+    """Simulate one user session through the app's code paths"""
+    if not recorder.timed("login", verify_user, username, password):
+        return
+
+    def read_crops():
+        user_id = get_user_id(username)
+        total = count_user_crops(user_id)
+        crops = get_user_crops(user_id, limit=20, offset=0)
+        return user_id, total, crops
+
+    user_id, _, crops = recorder.timed("read_crops", read_crops) or (None, 0, None)
+    if user_id is None:
+        return
+
+    if recorder.timed("save_crop", save_crop_details, user_id,
+                      f"Field {rng.integers(1_000_000)}", str(rng.choice(CROP_TYPES)),
+                      date.today().isoformat(), round(float(rng.uniform(0.5, 50)), 1),
+                      "Load test"):
+        recorder.count_write("crop_details")
+
+    analysis_results = recorder.timed("analyze_image", analyze_crop_image, io.BytesIO(image_bytes))
+    # The app only saves analyses against an existing crop
+    if analysis_results is None or crops is None or crops.empty:
+        return
+
+    def save_analysis():
+        ndvi_score = calculate_ndvi(analysis_results['green_ratio'], analysis_results['nir_estimate'])
+        stress_level = "Low" if ndvi_score > 0.6 else "Medium" if ndvi_score > 0.4 else "High"
+        detection = analysis_results['disease_detection']
+        result = {
+            'date': date.today().strftime('%Y-%m-%d'),
+            'ndvi': ndvi_score,
+            'green_ratio': analysis_results['green_ratio'],
+            'stress_level': stress_level,
+            'disease_detection': detection['disease_info']['name']
+            if detection['success'] else 'Not detected'
+        }
+        # Like the app, record against the crop first and only then write the CSV row
+        if not save_crop_analysis(user_id, int(crops['id'].iloc[0]), result):
+            return False
+        recorder.count_write("crop_analysis")
+        # save_analysis_result swallows its own errors; lost rows are found by count_rows
+        save_analysis_result(result)
+        recorder.count_write("csv")
+        return True
+
+    recorder.timed("save_analysis", save_analysis)
+
+
+def count_rows():
+    """Count saved analysis CSV rows and crop table rows"""
+    conn = crop_manager.get_db_connection()
+    cur = conn.cursor()
+    counts = {}
+    for table in ("crop_details", "crop_analysis"):
+        cur.execute(f"SELECT COUNT(*) FROM {table}")
+        counts[table] = cur.fetchone()[0]
+    cur.close()
+    conn.close()
+    counts["csv"] = len(load_historical_data())
+    return counts
+
+
+def check_writes(recorder, before, after):
+    """Count writes reported as successful but missing afterwards as errors"""
+    for table, operation in WRITE_OPERATIONS.items():
+        shortfall = recorder.writes[table] - (after[table] - before[table])
+        shortfall = min(max(shortfall, 0), recorder.writes[table])
+        if shortfall:
+            recorder.add_errors(operation, f"lost {table} rows", shortfall)
+
+
+def run_level(concurrency, sessions, users, images, seed):
+    """Run a batch of sessions with the given number of concurrent workers"""
+    recorder = Recorder()
+    rngs = [np.random.default_rng(seed + i) for i in range(sessions)]
+    before = count_rows()
+
+    # Helpers print their own errors; keep them out of the report
+    helper_output = io.StringIO()
+    start = time.perf_counter()
+    with redirect_stdout(helper_output), ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [
+            pool.submit(run_session, recorder, *users[i % len(users)], images[i % len(images)], rngs[i])
+            for i in range(sessions)
+        ]
+        for future in futures:
+            future.result()
+    wall_time = time.perf_counter() - start
+
+    check_writes(recorder, before, count_rows())
+    helper_messages = Counter(line for line in helper_output.getvalue().splitlines() if line)
+
+    return recorder, wall_time, helper_messages
+
+
+def format_report(concurrency, recorder, wall_time, helper_messages):
+    """Format per-operation throughput, latency percentiles, error rate and error breakdown"""
+    lines = [
+        f"\nConcurrency {concurrency} ({wall_time:.2f}s wall time)",
+        f"{'operation':<15}{'count':>7}{'ops/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>9}",
+    ]
+    for operation in OPERATIONS:
+        latencies = recorder.latencies.get(operation)
+        if not latencies:
+            lines.append(f"{operation:<15}{0:>7}{'-':>9}{'-':>10}{'-':>10}{'-':>10}{'-':>9}")
+            continue
+        p50, p95, p99 = np.percentile(np.array(latencies) * 1000, [50, 95, 99])
+        error_rate = recorder.errors[operation] / len(latencies)
+        lines.append(
+            f"{operation:<15}{len(latencies):>7}{len(latencies) / wall_time:>9.1f}"
+            f"{p50:>10.1f}{p95:>10.1f}{p99:>10.1f}{error_rate:>9.1%}"
+        )
+
+    if recorder.error_types:
+        lines.append("Errors:")
+        for (operation, error_type), count in sorted(recorder.error_types.items()):
+            lines.append(f"  {operation}: {error_type} x{count}")
+    if helper_messages:
+        lines.append("Logged by helpers:")
+        for message, count in helper_messages.most_common():
+            lines.append(f"  {message} x{count}")
+    return "\n".join(lines)
+
+
+def run_load_test(args, levels, rng):
+    """Create test accounts and images, then run each concurrency level"""
+    run_id = f"{int(time.time())}_{rng.integers(10_000)}"
+    users = [(f"loadtest_{run_id}_{i}", f"password_{i}") for i in range(args.users)]
+    with ThreadPoolExecutor(max_workers=args.users) as pool:
+        created = list(pool.map(lambda user: create_user(*user), users))
+    if not all(created):
+        raise SystemExit("Could not create load test users")
+
+    images = [make_synthetic_field_image(rng) for _ in range(args.images)]
+
+    for concurrency in levels:
+        recorder, wall_time, helper_messages = run_level(concurrency, args.sessions, users, images,
+                                                         args.seed + concurrency * args.sessions)
+        print(format_report(concurrency, recorder, wall_time, helper_messages))
+
+
+def positive_int(value):
+    """argparse type for integers >= 1"""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{value!r} is not an integer")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"{value!r} must be at least 1")
+    return number
+
+
+def positive_int_list(value):
+    """argparse type for a comma-separated list of integers >= 1"""
+    return [positive_int(item) for item in value.split(",")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent-session load test for AgriSense")
+    parser.add_argument("--concurrency", type=positive_int_list, default=[1, 2, 4, 8, 16],
+                        help="comma-separated concurrency levels to run (default: 1,2,4,8,16)")
+    parser.add_argument("--sessions", type=positive_int, default=32,
+                        help="simulated sessions per concurrency level (default: 32)")
+    parser.add_argument("--users", type=positive_int, default=8,
+                        help="number of test accounts sessions are spread across (default: 8)")
+    parser.add_argument("--images", type=positive_int, default=4,
+                        help="number of distinct synthetic images (default: 4)")
+    parser.add_argument("--database-url",
+                        help="ephemeral Postgres URL; defaults to a temporary SQLite stand-in")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    levels = args.concurrency
+    rng = np.random.default_rng(args.seed)
+
+    # The helpers pass raw DBAPI connections to pd.read_sql, which warns on every call
+    warnings.filterwarnings("ignore", message="pandas only supports SQLAlchemy")
+    original_cwd = os.getcwd()
+
+    with tempfile.TemporaryDirectory(prefix="agrisense-load-") as workdir:
+        if args.database_url:
+            use_postgres_database(args.database_url)
+            print("Using Postgres database")
+        else:
+            use_sqlite_database(os.path.join(workdir, "load_test.db"))
+            print("Using SQLite stand-in database")
+
+        # save_analysis_result writes to data/ relative to the working directory
+        os.chdir(workdir)
+        try:
+            run_load_test(args, levels, rng)
+        finally:
+            os.chdir(original_cwd)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+import pandas as pd
+import psycopg2
+import psycopg2.errors
+import os
+
+# The health summary is rebuilt for all users, so refresh it at most this often
+HEALTH_SUMMARY_REFRESH_MINUTES = 15
+
+# Advisory lock key so only one session refreshes the summary at a time
+HEALTH_SUMMARY_LOCK_ID = 260026
+
+def get_db_connection():
+    """Create database connection"""
+    return psycopg2.connect(os.environ["DATABASE_URL"])
+
+def init_analytics_db():
+    """Initialize the materialized crop health summary"""
+    conn = get_db_connection()
+    cur = conn.cursor()
+
+    try:
+        # Check first: CREATE INDEX IF NOT EXISTS would wait on a running refresh
+        cur.execute("""
+            SELECT EXISTS (
+                SELECT 1 FROM pg_attribute
+                WHERE attrelid = to_regclass('crop_health_summary') AND attname = 'refreshed_at'
+            )
+            FROM pg_matviews WHERE matviewname = 'crop_health_summary'
+        """)
+        summary = cur.fetchone()
+        if summary is not None and not summary[0]:
+            # Summary from before refreshed_at was added
+            cur.execute("DROP MATERIALIZED VIEW crop_health_summary")
+            summary = None
+        if summary is None:
+            cur.execute("""
+                CREATE MATERIALIZED VIEW crop_health_summary AS
+                SELECT c.user_id,
+                       c.crop_type,
+                       date_trunc('month', a.analyzed_at)::date AS month,
+                       AVG(a.ndvi) AS avg_ndvi,
+                       MIN(a.ndvi) AS min_ndvi,
+                       MAX(a.ndvi) AS max_ndvi,
+                       COUNT(*) AS analysis_count,
+                       MAX(a.analyzed_at) AS last_analyzed_at,
+                       now() AS refreshed_at
+                FROM crop_analysis a
+                JOIN crop_details c ON c.id = a.crop_id
+                GROUP BY c.user_id, c.crop_type, date_trunc('month', a.analyzed_at)::date
+            """)
+            # Unique index lets the summary be refreshed without blocking readers
+            cur.execute("""
+                CREATE UNIQUE INDEX idx_crop_health_summary_key
+                ON crop_health_summary (user_id, crop_type, month)
+            """)
+        conn.commit()
+    except (psycopg2.errors.UniqueViolation, psycopg2.errors.DuplicateTable,
+            psycopg2.errors.DuplicateObject):
+        # Another process created the summary at the same time
+        conn.rollback()
+    finally:
+        cur.close()
+        conn.close()
+
+def refresh_health_summary():
+    """
+    Refresh the materialized crop health summary, unless it was refreshed in
+    the last HEALTH_SUMMARY_REFRESH_MINUTES or another session is refreshing it
+    """
+    try:
+        conn = get_db_connection()
+        cur = conn.cursor()
+
+        cur.execute("SELECT pg_try_advisory_xact_lock(%s)", (HEALTH_SUMMARY_LOCK_ID,))
+        if not cur.fetchone()[0]:
+            conn.rollback()
+            cur.close()
+            conn.close()
+            return False
+
+        cur.execute("""
+            SELECT COALESCE(MAX(refreshed_at) > now() - make_interval(mins => %s), FALSE)
+            FROM crop_health_summary
+        """, (HEALTH_SUMMARY_REFRESH_MINUTES,))
+        if cur.fetchone()[0]:
+            conn.rollback()
+            cur.close()
+            conn.close()
+            return False
+
+        cur.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY crop_health_summary")
+
+        conn.commit()
+        cur.close()
+        conn.close()
+        return True
+    except Exception as e:
+        print(f"Error refreshing health summary: {e}")
+        return False
+
+def get_hectares_by_crop_type(user_id):
+    """Get total field size and field count per crop type for a user"""
+    conn = None
+    try:
+        conn = get_db_connection()
+        query = """
+            SELECT crop_type,
+                   COUNT(*) AS field_count,
+                   SUM(field_size) AS total_hectares
+            FROM crop_details
+            WHERE user_id = %s
+            GROUP BY crop_type
+            ORDER BY total_hectares DESC
+        """
+        return pd.read_sql(query, conn, params=(user_id,))
+    except Exception as e:
+        print(f"Error getting hectares by crop type: {e}")
+        return pd.DataFrame(columns=['crop_type', 'field_count', 'total_hectares'])
+    finally:
+        if conn is not None:
+            conn.close()
+
+def get_health_by_crop_type_and_month(user_id):
+    """Get average health per crop type and month from the materialized summary"""
+    conn = None
+    try:
+        conn = get_db_connection()
+        query = """
+            SELECT crop_type, month, avg_ndvi, min_ndvi, max_ndvi, analysis_count
+            FROM crop_health_summary
+            WHERE user_id = %s
+            ORDER BY month, crop_type
+        """
+        return pd.read_sql(query, conn, params=(user_id,))
+    except Exception as e:
+        print(f"Error getting health summary: {e}")
+        return pd.DataFrame(columns=['crop_type', 'month', 'avg_ndvi', 'min_ndvi',
+                                     'max_ndvi', 'analysis_count'])
+    finally:
+        if conn is not None:
+            conn.close()
+
+def get_summary_last_updated(user_id):
+    """Get the most recent analysis timestamp included in the summary"""
+    try:
+        conn = get_db_connection()
+        cur = conn.cursor()
+
+        cur.execute("SELECT MAX(last_analyzed_at) FROM crop_health_summary WHERE user_id = %s",
+                    (user_id,))
+        last_updated = cur.fetchone()[0]
+
+        cur.close()
+        conn.close()
+        return last_updated
+    except Exception as e:
+        print(f"Error getting summary timestamp: {e}")
+        return None
+
+def get_summary_refreshed_at():
+    """Get when the materialized crop health summary was last refreshed"""
+    try:
+        conn = get_db_connection()
+        cur = conn.cursor()
+
+        cur.execute("SELECT MAX(refreshed_at) FROM crop_health_summary")
+        refreshed_at = cur.fetchone()[0]
+
+        cur.close()
+        conn.close()
+        return refreshed_at
+    except Exception as e:
+        print(f"Error getting summary refresh time: {e}")
+        return None
@@ -1,5 +1,6 @@
 import pandas as pd
 import psycopg2
+import psycopg2.errors
 from psycopg2.extras import RealDictCursor
 import os
 
@@ -7,6 +8,56 @@ def get_db_connection():
     """Create database connection"""
     return psycopg2.connect(os.environ["DATABASE_URL"])
 
+def init_crop_db():
+    """Initialize crop and crop analysis tables"""
+    conn = get_db_connection()
+    cur = conn.cursor()
+
+    try:
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS crop_details (
+                id SERIAL PRIMARY KEY,
+                user_id INTEGER REFERENCES users(id),
+                crop_name VARCHAR(100) NOT NULL,
+                crop_type VARCHAR(50) NOT NULL,
+                planting_date DATE,
+                field_size NUMERIC(10, 2),
+                field_location VARCHAR(200),
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS crop_analysis (
+                id SERIAL PRIMARY KEY,
+                crop_id INTEGER REFERENCES crop_details(id) ON DELETE CASCADE,
+                ndvi REAL NOT NULL,
+                green_ratio REAL,
+                stress_level VARCHAR(20),
+                disease_detection VARCHAR(50),
+                analyzed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+
+        # CREATE INDEX IF NOT EXISTS locks the table before checking, so only
+        # issue it for indexes that are actually missing
+        indexes = {
+            'idx_crop_details_user': "CREATE INDEX idx_crop_details_user ON crop_details (user_id, created_at DESC)",
+            'idx_crop_analysis_crop': "CREATE INDEX idx_crop_analysis_crop ON crop_analysis (crop_id, analyzed_at)",
+        }
+        cur.execute("SELECT indexname FROM pg_indexes WHERE indexname = ANY(%s)", (list(indexes),))
+        existing = {row[0] for row in cur.fetchall()}
+        for name, statement in indexes.items():
+            if name not in existing:
+                cur.execute(statement)
+        conn.commit()
+    except (psycopg2.errors.UniqueViolation, psycopg2.errors.DuplicateTable,
+            psycopg2.errors.DuplicateObject):
+        # Another process created the schema at the same time
+        conn.rollback()
+    finally:
+        cur.close()
+        conn.close()
+
 def get_user_id(username):
     """Get user ID from username"""
     conn = get_db_connection()
@@ -40,18 +91,64 @@ def save_crop_details(user_id, crop_name, crop_type, planting_date, field_size,
         print(f"Error saving crop details: {e}")
         return False
 
-def get_user_crops(user_id):
-    """Get all crops for a user"""
+def save_crop_analysis(user_id, crop_id, result):
+    """Record an analysis result against a crop owned by the user"""
+    try:
+        conn = get_db_connection()
+        cur = conn.cursor()
+
+        # Only insert when the crop belongs to this user
+        cur.execute("""
+            INSERT INTO crop_analysis
+            (crop_id, ndvi, green_ratio, stress_level, disease_detection)
+            SELECT id, %s, %s, %s, %s FROM crop_details
+            WHERE id = %s AND user_id = %s
+        """, (float(result['ndvi']), float(result['green_ratio']),
+              result['stress_level'], result['disease_detection'], crop_id, user_id))
+        saved = cur.rowcount == 1
+
+        conn.commit()
+        cur.close()
+        conn.close()
+        return saved
+    except Exception as e:
+        print(f"Error saving crop analysis: {e}")
+        return False
+
+def get_user_crops(user_id, limit=None, offset=0):
+    """Get crops for a user, optionally one page at a time"""
+    conn = None
     try:
         conn = get_db_connection()
         query = """
             SELECT * FROM crop_details 
             WHERE user_id = %s 
-            ORDER BY created_at DESC
+            ORDER BY created_at DESC, id DESC
         """
-        return pd.read_sql(query, conn, params=(user_id,))
+        params = (user_id,)
+        if limit is not None:
+            query += " LIMIT %s OFFSET %s"
+            params = (user_id, limit, offset)
+        return pd.read_sql(query, conn, params=params)
     except Exception as e:
         print(f"Error getting user crops: {e}")
         return pd.DataFrame()
     finally:
+        if conn is not None:
+            conn.close()
+
+def count_user_crops(user_id):
+    """Count crops for a user"""
+    try:
+        conn = get_db_connection()
+        cur = conn.cursor()
+
+        cur.execute("SELECT COUNT(*) FROM crop_details WHERE user_id = %s", (user_id,))
+        count = cur.fetchone()[0]
+
+        cur.close()
         conn.close()
+        return count
+    except Exception as e:
+        print(f"Error counting user crops: {e}")
+        return 0
@@ -39,23 +39,27 @@ class DiseaseDetector:
         ])
         return features.reshape(1, -1)
 
-    def preprocess_image(self, image_data):
+    def preprocess_image(self, image_data, reduced=False):
         """Preprocess the image for feature extraction"""
         if isinstance(image_data, bytes):
             img = Image.open(io.BytesIO(image_data))
         else:
             img = Image.open(image_data)
 
+        if reduced:
+            # Let the JPEG decoder skip straight to a size close to the target
+            img.draft('RGB', self.target_size)
+
         img = img.convert('RGB')
         img = img.resize(self.target_size)
         img_array = np.array(img)
         return img_array
 
-    def detect_disease(self, image_data):
+    def detect_disease(self, image_data, reduced=False):
         """Detect disease in the given image"""
         try:
             # Preprocess the image
-            img_array = self.preprocess_image(image_data)
+            img_array = self.preprocess_image(image_data, reduced=reduced)
 
             # Extract features
             features = self._extract_features(img_array)
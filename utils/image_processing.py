@@ -7,20 +7,21 @@ from utils.disease_detection import DiseaseDetector
 # Initialize disease detector
 disease_detector = DiseaseDetector()
 
-def analyze_crop_image(uploaded_file):
-    """
-    Analyze uploaded crop image for health indicators and diseases
-    """
-    # Convert uploaded file to opencv format
-    file_bytes = np.asarray(bytearray(uploaded_file.read()), dtype=np.uint8)
-    img = cv2.imdecode(file_bytes, cv2.IMREAD_COLOR)
-
-    # Reset file pointer for disease detection
-    uploaded_file.seek(0)
+# Reduced-size decode flags; for JPEG, OpenCV scales during the DCT instead of
+# decoding the full image and resizing
+REDUCED_DECODE_FLAGS = {
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
 
-    # Perform disease detection
-    disease_results = disease_detector.detect_disease(uploaded_file)
+# Default downscale factor for preview analysis
+PREVIEW_REDUCTION = 8
 
+def _measure_vegetation(img):
+    """
+    Measure green ratio and NIR estimate of a BGR image
+    """
     # Convert BGR to HSV
     hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
 
@@ -40,12 +41,84 @@ def analyze_crop_image(uploaded_file):
     red_channel = img[:,:,2]
     nir_estimate = np.mean(red_channel) / 255.0
 
+    return green_ratio, nir_estimate
+
+def analyze_crop_image(uploaded_file):
+    """
+    Analyze uploaded crop image for health indicators and diseases
+    """
+    # Convert uploaded file to opencv format
+    file_bytes = np.asarray(bytearray(uploaded_file.read()), dtype=np.uint8)
+    img = cv2.imdecode(file_bytes, cv2.IMREAD_COLOR)
+
+    # Reset file pointer for disease detection
+    uploaded_file.seek(0)
+
+    # Perform disease detection
+    disease_results = disease_detector.detect_disease(uploaded_file)
+
+    green_ratio, nir_estimate = _measure_vegetation(img)
+
     return {
         'green_ratio': green_ratio,
         'nir_estimate': nir_estimate,
         'disease_detection': disease_results
     }
 
+def preview_crop_image(uploaded_file, reduction=PREVIEW_REDUCTION):
+    """
+    Quickly analyze a strongly downscaled copy of the image.
+
+    Returns the same keys as analyze_crop_image plus 'error_estimate'. The
+    green ratio and NIR bounds are the change when the preview is halved
+    again; metrics converge as resolution increases, so this approximates
+    the drift from the full-resolution result. The NDVI bound follows from
+    those two.
+    """
+    file_bytes = np.asarray(bytearray(uploaded_file.read()), dtype=np.uint8)
+    img = cv2.imdecode(file_bytes, REDUCED_DECODE_FLAGS[reduction])
+
+    uploaded_file.seek(0)
+    disease_results = disease_detector.detect_disease(uploaded_file, reduced=True)
+
+    green_ratio, nir_estimate = _measure_vegetation(img)
+
+    # Compare against one further halving to estimate the remaining error
+    half = cv2.resize(img, (max(img.shape[1] // 2, 1), max(img.shape[0] // 2, 1)),
+                      interpolation=cv2.INTER_AREA)
+    half_green_ratio, half_nir_estimate = _measure_vegetation(half)
+
+    green_error = abs(green_ratio - half_green_ratio)
+    # A channel mean barely moves when halved, so allow for the rounding
+    # of the reduced decode itself (one 8-bit level)
+    nir_error = max(abs(nir_estimate - half_nir_estimate), 1 / 255.0)
+
+    return {
+        'green_ratio': green_ratio,
+        'nir_estimate': nir_estimate,
+        'disease_detection': disease_results,
+        'error_estimate': {
+            'green_ratio': green_error,
+            'nir_estimate': nir_error,
+            'ndvi': _ndvi_error_bound(green_ratio, nir_estimate, green_error, nir_error)
+        }
+    }
+
+def _ndvi_error_bound(green_ratio, nir_estimate, green_error, nir_error):
+    """
+    Largest NDVI change within the green ratio and NIR error bounds
+    """
+    # NDVI is monotonic in both inputs, so the extremes lie at the corners
+    ndvi = calculate_ndvi(green_ratio, nir_estimate)
+    bound = 0.0
+    for green in (green_ratio - green_error, green_ratio + green_error):
+        for nir in (nir_estimate - nir_error, nir_estimate + nir_error):
+            corner_green = min(max(green, 0.0), 1.0)
+            corner_nir = min(max(nir, 0.0), 1.0)
+            if corner_nir + (1 - corner_green) > 0:
+                bound = max(bound, abs(calculate_ndvi(corner_green, corner_nir) - ndvi))
+    return bound
+
 def calculate_ndvi(green_ratio, nir_estimate):
     """
     Calculate a simplified NDVI-like score
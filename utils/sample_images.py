@@ -0,0 +1,24 @@
+import cv2
+import numpy as np
+
+def make_synthetic_field_image(rng, width=1024, height=768, quality=90):
+    """
+    Create a JPEG-encoded field photo: textured green canopy with brown soil
+    and lesion-like patches
+    """
+    img = np.empty((height, width, 3), dtype=np.uint8)
+    base = rng.integers([20, 90, 30], [60, 170, 80])  # BGR canopy colour
+    noise = rng.normal(0, 18, size=(height, width, 3))
+    img[:] = np.clip(base + noise, 0, 255)
+
+    for _ in range(rng.integers(3, 15)):
+        center = (int(rng.integers(0, width)), int(rng.integers(0, height)))
+        axes = (int(rng.integers(10, width // 6)), int(rng.integers(10, height // 6)))
+        color = tuple(int(c) for c in rng.integers([20, 50, 90], [70, 110, 170]))
+        cv2.ellipse(img, center, axes, float(rng.uniform(0, 180)), 0, 360, color, -1)
+
+    img = cv2.GaussianBlur(img, (5, 5), 0)
+    ok, encoded = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise RuntimeError("Could not encode synthetic image")
+    return encoded.tobytes()
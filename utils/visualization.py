@@ -51,3 +51,47 @@ def plot_health_metrics(data):
     )
     
     return fig
+
+def plot_hectares_by_crop_type(data):
+    """
+    Create a bar chart of total field size per crop type
+    """
+    fig = go.Figure()
+    
+    fig.add_trace(go.Bar(
+        x=data['crop_type'],
+        y=data['total_hectares'],
+        text=data['field_count'].map(lambda n: f"{n} field" if n == 1 else f"{n} fields"),
+        marker_color='#4CAF50'
+    ))
+    
+    fig.update_layout(
+        title='Total Hectares by Crop Type',
+        xaxis_title='Crop Type',
+        yaxis_title='Hectares',
+        template='plotly_white',
+        height=400
+    )
+    
+    return fig
+
+def plot_health_by_crop_type(data):
+    """
+    Create a line plot of average health per crop type and month
+    """
+    fig = px.line(
+        data,
+        x='month',
+        y='avg_ndvi',
+        color='crop_type',
+        markers=True,
+        labels={'month': 'Month', 'avg_ndvi': 'Average Health Score (NDVI)', 'crop_type': 'Crop Type'}
+    )
+    
+    fig.update_layout(
+        title='Average Health by Crop Type',
+        template='plotly_white',
+        height=400
+    )
+    
+    return fig